@@ -15,7 +15,7 @@ def tests(session: Session) -> None:
     """Run tests."""
     args = session.posargs + ["--cov=morfeus", "--import-mode=importlib", "-s"]
     session.install("-r", "requirements.txt")
-    session.install("pytest", "pytest-cov")
+    session.install("pytest", "pytest-cov", "numba")
     session.install("-e", ".", "--no-deps")
     session.run("pytest", *args)
 
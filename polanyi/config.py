@@ -8,3 +8,4 @@ OMP_NUM_THREADS: int = 1
 OMP_STACKSIZE: str = "1G"
 OMP_MAX_ACTIVE_LEVELS: int = 1
 TMP_DIR: Optional[str] = None
+CPU_AFFINITY: bool = False
@@ -2,11 +2,23 @@
 
 from __future__ import annotations
 
-from typing import Iterable, Mapping, Optional, overload, Tuple, Union
+from typing import Any, Callable, Iterable, Mapping, Optional, overload, Tuple, Union
 
 import numpy as np
 
-from polanyi.typing import Array2D, ArrayLike1D, ArrayLike2D
+from polanyi.typing import Array1D, Array2D, Array3D, ArrayLike1D, ArrayLike2D
+
+try:
+    from numba import njit
+except ImportError:
+
+    def njit(*args, **kwargs) -> Callable[..., Any]:
+        """Returns decorator that leaves function unchanged without Numba."""
+
+        def decorator(function: Callable[..., Any]) -> Callable[..., Any]:
+            return function
+
+        return decorator
 
 
 @overload
@@ -119,3 +131,54 @@ def evb_eigenvalues(  # noqa: C901
             return energies_ad, hessians_ad, indices
 
     return energies_ad, indices
+
+
+@njit(fastmath=True, cache=True, boundscheck=False)
+def evb_eigenvalues_nb(
+    energies: Array1D, gradients: Array3D, coupling: float
+) -> Tuple[Array1D, Array3D, Array1D]:
+    """Returns EVB eigenvalues for energies and gradients of two diabatic states.
+
+    Analytic solution of the 2x2 EVB Hamiltonian with constant coupling, compiled with
+    Numba if available.
+
+    Args:
+        energies: Energies of diabatic states (a.u.), shape (2,)
+        gradients: Gradients of diabatic states (a.u.), shape (2, n_atoms, 3)
+        coupling: Coupling term (a.u.)
+
+    Returns:
+        energies_ad: Energies of adiabatic states (a.u.)
+        gradients_ad: Gradients of adiabatic states (a.u.)
+        indices: Diabatic state index most closely matching adiabatic sates
+
+    Raises:
+        ValueError: When there are not two diabatic states.
+    """
+    if energies.shape[0] != 2:
+        raise ValueError("Only two diabatic states are supported.")
+
+    # Adiabatic energies from analytic eigenvalues
+    mean = (energies[0] + energies[1]) / 2
+    half_diff = (energies[0] - energies[1]) / 2
+    root = np.sqrt(half_diff**2 + coupling**2)
+    energies_ad = np.empty(2)
+    energies_ad[0] = mean - root
+    energies_ad[1] = mean + root
+
+    # Weight of first diabatic state in lower adiabatic state
+    if root > 0:
+        weight = (1 - half_diff / root) / 2
+    else:
+        weight = 1.0
+
+    # Mix gradients with the squared eigenvector components
+    gradients_ad = np.empty_like(gradients)
+    gradients_ad[0] = weight * gradients[0] + (1 - weight) * gradients[1]
+    gradients_ad[1] = (1 - weight) * gradients[0] + weight * gradients[1]
+
+    indices = np.empty(2, dtype=np.int64)
+    indices[0] = 0 if weight >= 0.5 else 1
+    indices[1] = 0 if weight <= 0.5 else 1
+
+    return energies_ad, gradients_ad, indices
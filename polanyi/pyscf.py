@@ -2,17 +2,18 @@
 
 from __future__ import annotations
 
-from collections.abc import Callable, MutableMapping, Sequence
-from contextlib import redirect_stderr, redirect_stdout
+from collections.abc import Callable, Iterable, Iterator, MutableMapping, Sequence
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import contextmanager, redirect_stderr, redirect_stdout
 from dataclasses import dataclass, field
 import functools
 from io import StringIO
+import multiprocessing
 import os
 from os import PathLike
 from pathlib import Path
-import tempfile
 from tempfile import TemporaryDirectory
-from typing import Any, Optional, Union
+from typing import Any, ClassVar, Mapping, Optional, Union
 
 import geometric
 from geometric.engine import ConicalIntersection
@@ -21,79 +22,190 @@ from pyscf import __config__, lib
 from pyscf.geomopt import as_pyscf_method, berny_solver, geometric_solver
 from pyscf.grad.rhf import GradientsMixin
 from pyscf.gto import Mole
+from wurlitzer import pipes
 
 from polanyi import config
-from polanyi.data import BOHR_TO_ANGSTROM
-from polanyi.evb import evb_eigenvalues
-from polanyi.typing import Array2D, ArrayLike2D
-from polanyi.utils import convert_elements
+from polanyi.data import atomic_numbers, BOHR_TO_ANGSTROM
+from polanyi.evb import evb_eigenvalues_nb
+from polanyi.typing import Array1D, Array2D, Array3D, Array4D, ArrayLike2D
+from polanyi.utils import convert_elements, split_cpus
+from polanyi.worker import init_worker, ts_from_gfnff_python_case
 from polanyi.xtb import parse_engrad, run_xtb, XTBCalculator
 
 
 @dataclass
 class OptResults:
-    """Results of PySCF geometry optimization."""
-
-    coordinates: list[Array2D] = field(default_factory=list)
-    energies_diabatic: list[list[float]] = field(default_factory=list)
-    energies_adiabatic: list[list[float]] = field(default_factory=list)
-    gradients_diabatic: list[list[Array2D]] = field(default_factory=list)
-    gradients_adiabatic: list[list[Array2D]] = field(default_factory=list)
-    indices: list[list[int]] = field(default_factory=list)
+    """Results of PySCF geometry optimization.
+
+    Results of each step are stored in arrays with steps along the first axis. The
+    arrays are preallocated with allocate and grow when more steps are added. Only the
+    first n_steps entries are valid until trim is called.
+    """
+
+    _step_fields: ClassVar[tuple[str, ...]] = (
+        "coordinates",
+        "energies_diabatic",
+        "energies_adiabatic",
+        "gradients_diabatic",
+        "gradients_adiabatic",
+        "indices",
+    )
+
+    coordinates: Array3D = field(default_factory=lambda: np.empty((0, 0, 3)))
+    energies_diabatic: Array2D = field(default_factory=lambda: np.empty((0, 0)))
+    energies_adiabatic: Array2D = field(default_factory=lambda: np.empty((0, 0)))
+    gradients_diabatic: Array4D = field(default_factory=lambda: np.empty((0, 0, 0, 3)))
+    gradients_adiabatic: Array4D = field(default_factory=lambda: np.empty((0, 0, 0, 3)))
+    indices: Array2D = field(default_factory=lambda: np.empty((0, 0), dtype=int))
+    n_steps: int = 0
     stdout: str = ""
     stderr: str = ""
 
+    @classmethod
+    def allocate(
+        cls: type[OptResults], n_steps: int, n_atoms: int, n_states: int
+    ) -> OptResults:
+        """Returns results with storage preallocated for n_steps steps."""
+        return cls(
+            coordinates=np.empty((n_steps, n_atoms, 3)),
+            energies_diabatic=np.empty((n_steps, n_states)),
+            energies_adiabatic=np.empty((n_steps, n_states)),
+            gradients_diabatic=np.empty((n_steps, n_states, n_atoms, 3)),
+            gradients_adiabatic=np.empty((n_steps, n_states, n_atoms, 3)),
+            indices=np.empty((n_steps, n_states), dtype=int),
+        )
+
+    def add_step(
+        self,
+        coordinates: Array2D,
+        energies_diabatic: Array1D,
+        energies_adiabatic: Array1D,
+        gradients_diabatic: Array3D,
+        gradients_adiabatic: Array3D,
+        indices: Array1D,
+    ) -> None:
+        """Store results of step, growing the storage when it is full."""
+        values = (
+            coordinates,
+            energies_diabatic,
+            energies_adiabatic,
+            gradients_diabatic,
+            gradients_adiabatic,
+            indices,
+        )
+        if self.n_steps == len(self.coordinates):
+            self._grow(values)
+        for name, value in zip(self._step_fields, values):
+            getattr(self, name)[self.n_steps] = value
+        self.n_steps += 1
+
+    def trim(self) -> None:
+        """Trim storage to the steps taken."""
+        for name in self._step_fields:
+            setattr(self, name, getattr(self, name)[: self.n_steps])
+
+    def _grow(self, values: Sequence[Any]) -> None:
+        """Double storage, taking the shapes of new storage from step values."""
+        for name, value in zip(self._step_fields, values):
+            array = getattr(self, name)
+            new_array = np.empty(
+                (max(len(array), 1),) + np.shape(value), dtype=array.dtype
+            )
+            if self.n_steps > 0:
+                new_array = np.concatenate([array[: self.n_steps], new_array])
+            setattr(self, name, new_array)
+
 
 def e_g_function(
     mol: "Mole",
     topologies: Sequence[bytes],
     results: OptResults,
-    keywords: Optional[list[str]] = None,
+    keywords: Optional[Iterable[str]] = None,
     xcontrol_keywords: Optional[MutableMapping[str, list[str]]] = None,
     e_shift: float = 0,
     coupling: float = 0,
     path: Optional[Union[str, PathLike]] = None,
+    elements: Optional[Array1D] = None,
+    coordinates_buffer: Optional[Array2D] = None,
+    xtb_paths: Optional[Sequence[Path]] = None,
+    n_threads: Optional[int] = None,
+    cpu_groups: Optional[Sequence[list[int]]] = None,
 ) -> tuple[float, Array2D]:
-    """Find TS with GFN-FF."""
+    """Find TS with GFN-FF.
+
+    Args:
+        mol: PySCF Mole with current geometry
+        topologies: GFN-FF topologies of diabatic states
+        results: Results to store step in
+        keywords: xtb command line keywords. Keywords given as a frozenset are assumed
+            to be normalized already.
+        xcontrol_keywords: Keywords for xcontrol file
+        e_shift: Energy shift of last diabatic state (a.u.)
+        coupling: Coupling term of EVB (a.u.)
+        path: Directory to run xtb in. Defaults to temporary directories.
+        elements: Atomic numbers. Defaults to atomic charges of mol.
+        coordinates_buffer: Buffer to write coordinates (Å) into, reused between steps
+        xtb_paths: xtb directories for the topologies, reused as is. They should
+            already contain the topologies, e.g., as set up by ts_from_gfnff.
+        n_threads: Number of OpenMP threads per xtb run. Defaults to
+            config.OMP_NUM_THREADS split between topologies.
+        cpu_groups: Groups of CPUs to pin the xtb run of each topology to
+
+    Returns:
+        energy: Energy of upper adiabatic state (a.u.)
+        gradient: Gradient of upper adiabatic state (a.u.)
+    """
+    if not isinstance(keywords, frozenset):
+        keywords = _gfnff_keywords(keywords)
+
     # Get coordinates
     topologies = list(topologies)
-    if path is None:
+    if xtb_paths is not None:
+        cleanup = False
+    elif path is None:
         path = Path.cwd()
         temp_dirs = [
             TemporaryDirectory(dir=config.TMP_DIR) for i in range(len(topologies))
         ]
         xtb_paths = [path / temp_dir.name for temp_dir in temp_dirs]
+        _write_topologies(topologies, xtb_paths)
         cleanup = True
     else:
         path = Path(path)
         xtb_paths = [path / str(i) for i in range(len(topologies))]
+        _write_topologies(topologies, xtb_paths, overwrite=False)
         cleanup = False
-    elements = mol.atom_charges()
-    coordinates = mol.atom_coords() * BOHR_TO_ANGSTROM
-
+    if elements is None:
+        elements = mol.atom_charges()
+    coordinates = _get_coordinates(mol, coordinates_buffer)
+
+    # Run xtb for the topologies in parallel, splitting the threads between them
+    if n_threads is None:
+        n_threads = max(1, config.OMP_NUM_THREADS // len(topologies))
+    run_partial = functools.partial(
+        _run_topology,
+        elements=elements,
+        coordinates=coordinates,
+        keywords=keywords,
+        xcontrol_keywords=xcontrol_keywords,
+        n_threads=n_threads,
+    )
     energies = []
     gradients = []
-    for topology, xtb_path in zip(topologies, xtb_paths):
-        xtb_path.mkdir(exist_ok=True)
-        if not (xtb_path / "gfnff_topo").exists():
-            with open(xtb_path / "gfnff_topo", "wb") as f:
-                f.write(topology)
-        run_xtb(
-            elements,
-            coordinates,
-            path=xtb_path,
-            keywords=keywords,
-            xcontrol_keywords=xcontrol_keywords,
-        )
-        energy, gradient = parse_engrad(xtb_path / "xtb.engrad")
-        energies.append(energy)
-        gradients.append(gradient)
+    with ThreadPoolExecutor(max_workers=len(topologies)) as executor:
+        for energy, gradient in executor.map(
+            run_partial, xtb_paths, cpu_groups or [None] * len(topologies)
+        ):
+            energies.append(energy)
+            gradients.append(gradient)
 
     energies[-1] += e_shift
+    energies_diabatic = np.array(energies)
+    gradients_diabatic = np.stack(gradients)
 
     # Solve EVB
-    energies_ad, gradients_ad, indices = evb_eigenvalues(
-        energies, gradients=gradients, coupling=coupling
+    energies_ad, gradients_ad, indices = evb_eigenvalues_nb(
+        energies_diabatic, gradients_diabatic, float(coupling)
     )
 
     # Clean up temporary directory
@@ -102,16 +214,69 @@ def e_g_function(
             temp_dir.cleanup()
 
     # Store results
-    results.coordinates.append(coordinates)
-    results.energies_diabatic.append(energies)
-    results.energies_adiabatic.append(energies_ad)
-    results.gradients_diabatic.append(gradients)
-    results.gradients_adiabatic.append(gradients_ad)
-    results.indices.append(indices)
+    results.add_step(
+        coordinates,
+        energies_diabatic,
+        energies_ad,
+        gradients_diabatic,
+        gradients_ad,
+        indices,
+    )
 
     return energies_ad[1], gradients_ad[1]
 
 
+def _get_coordinates(mol: "Mole", buffer: Optional[Array2D] = None) -> Array2D:
+    """Returns coordinates (Å) of Mole, written into buffer if given."""
+    if buffer is None:
+        coordinates: Array2D = mol.atom_coords() * BOHR_TO_ANGSTROM
+    else:
+        coordinates = np.multiply(mol.atom_coords(), BOHR_TO_ANGSTROM, out=buffer)
+    return coordinates
+
+
+def _gfnff_keywords(keywords: Optional[Iterable[str]] = None) -> frozenset[str]:
+    """Returns normalized xtb keywords for GFN-FF energy and gradient."""
+    if keywords is None:
+        keywords = []
+    keywords_ = set([keyword.strip().lower() for keyword in keywords])
+    keywords_.update(["--gfnff", "--grad"])
+    return frozenset(keywords_)
+
+
+def _write_topologies(
+    topologies: Sequence[bytes], xtb_paths: Sequence[Path], overwrite: bool = True
+) -> None:
+    """Write GFN-FF topologies to xtb directories."""
+    for topology, xtb_path in zip(topologies, xtb_paths):
+        xtb_path.mkdir(exist_ok=True)
+        if overwrite is True or not (xtb_path / "gfnff_topo").exists():
+            with open(xtb_path / "gfnff_topo", "wb") as f:
+                f.write(topology)
+
+
+def _run_topology(
+    xtb_path: Path,
+    cpus: Optional[list[int]],
+    elements: Array1D,
+    coordinates: Array2D,
+    keywords: Optional[Iterable[str]] = None,
+    xcontrol_keywords: Optional[MutableMapping[str, list[str]]] = None,
+    n_threads: Optional[int] = None,
+) -> tuple[float, Array2D]:
+    """Run xtb with GFN-FF topology and return energy and gradient."""
+    run_xtb(
+        elements,
+        coordinates,
+        path=xtb_path,
+        keywords=keywords,
+        xcontrol_keywords=xcontrol_keywords,
+        n_threads=n_threads,
+        cpus=cpus,
+    )
+    return parse_engrad(xtb_path / "xtb.engrad")
+
+
 def e_g_function_python(
     mol: "Mole",
     calculators: Sequence[XTBCalculator],
@@ -119,6 +284,8 @@ def e_g_function_python(
     e_shift: float = 0,
     coupling: float = 0,
     path: Optional[Union[str, PathLike]] = None,
+    coordinates_buffer: Optional[Array2D] = None,
+    parallel: bool = False,
 ) -> tuple[float, Array2D]:
     """Find TS with GFN-FF."""
     if path is None:
@@ -126,39 +293,59 @@ def e_g_function_python(
     else:
         path = Path(path)
     # Get coordinates
-    coordinates: np.ndarray = np.ascontiguousarray(mol.atom_coords()) * BOHR_TO_ANGSTROM
-
+    coordinates = _get_coordinates(mol, coordinates_buffer)
+
+    # Run calculators under a common pipe, as redirection is per process. Threads are
+    # opt-in as each one starts its own team of OpenMP threads in xtb.
+    sp_partial = functools.partial(_sp_calculator, coordinates=coordinates)
+    with pipes() as _:
+        if parallel is True:
+            with ThreadPoolExecutor(max_workers=len(calculators)) as executor:
+                sp_results = list(executor.map(sp_partial, calculators))
+        else:
+            sp_results = [sp_partial(calculator) for calculator in calculators]
     energies = []
     gradients = []
-    for calculator in calculators:
-        calculator.coordinates = coordinates
-        energy, gradient = calculator.sp(return_gradient=True)
+    for energy, gradient in sp_results:
         energies.append(energy)
         gradients.append(gradient)
 
     energies[-1] += e_shift
+    energies_diabatic = np.array(energies)
+    gradients_diabatic = np.stack(gradients)
 
     # Solve EVB
-    energies_ad, gradients_ad, indices = evb_eigenvalues(
-        energies, gradients=gradients, coupling=coupling
+    energies_ad, gradients_ad, indices = evb_eigenvalues_nb(
+        energies_diabatic, gradients_diabatic, float(coupling)
     )
 
     # Store results
-    results.coordinates.append(coordinates)
-    results.energies_diabatic.append(energies)
-    results.energies_adiabatic.append(energies_ad)
-    results.gradients_diabatic.append(gradients)
-    results.gradients_adiabatic.append(gradients_ad)
-    results.indices.append(indices)
+    results.add_step(
+        coordinates,
+        energies_diabatic,
+        energies_ad,
+        gradients_diabatic,
+        gradients_ad,
+        indices,
+    )
 
     return energies_ad[1], gradients_ad[1]
 
 
+def _sp_calculator(
+    calculator: XTBCalculator, coordinates: Array2D
+) -> tuple[float, Array2D]:
+    """Update calculator coordinates and return energy and gradient."""
+    calculator.coordinates = coordinates
+    return calculator.sp(return_gradient=True, pipe_output=False)
+
+
 def e_g_function_ci_python(
     mol: "Mole",
     calculator: XTBCalculator,
     e_shift: float = 0,
     path: Optional[Union[str, PathLike]] = None,
+    coordinates_buffer: Optional[Array2D] = None,
 ) -> tuple[float, Array2D]:
     """Find TS with GFN-FF."""
     if path is None:
@@ -167,7 +354,7 @@ def e_g_function_ci_python(
         path = Path(path)
 
     # Get coordinates
-    coordinates = np.ascontiguousarray(mol.atom_coords())
+    coordinates = _get_coordinates(mol, coordinates_buffer)
 
     calculator.coordinates = coordinates
     energy, gradient = calculator.sp(return_gradient=True)
@@ -176,6 +363,23 @@ def e_g_function_ci_python(
     return energy, gradient
 
 
+@contextmanager
+def _redirect_output(
+    capture: bool = False,
+) -> Iterator[tuple[Optional[StringIO], Optional[StringIO]]]:
+    """Redirect stdout and stderr to StringIO objects if captured, else to devnull."""
+    if capture is True:
+        with redirect_stdout(StringIO()) as stdout, redirect_stderr(
+            StringIO()
+        ) as stderr:
+            yield stdout, stderr
+    else:
+        with open(os.devnull, "w") as devnull, redirect_stdout(
+            devnull
+        ), redirect_stderr(devnull):
+            yield None, None
+
+
 def ts_from_gfnff(
     elements: Union[Sequence[int], Sequence[str]],
     coordinates: ArrayLike2D,
@@ -189,19 +393,56 @@ def ts_from_gfnff(
     conv_params: Optional[dict[str, Any]] = None,
     solver: str = "geometric",
     path: Optional[Union[str, PathLike]] = None,
+    capture_output: bool = False,
 ) -> OptResults:
-    """Optimize TS with GFNFF."""
+    """Optimize TS with GFNFF.
+
+    Args:
+        elements: Elements as atomic symbols or numbers
+        coordinates: Coordinates (Å)
+        topologies: GFN-FF topologies of diabatic states
+        keywords: xtb command line keywords
+        xcontrol_keywords: Keywords for xcontrol file
+        e_shift: Energy shift of last diabatic state (a.u.)
+        coupling: Coupling term of EVB (a.u.)
+        maxsteps: Maximum number of optimization steps
+        callback: Callback of optimizer, called after each step
+        conv_params: Convergence parameters of optimizer
+        solver: Optimizer: 'geometric' or 'pyberny'
+        path: Directory to run calculations in
+        capture_output: Whether to store optimizer output in stdout and stderr of
+            the results. Otherwise, it is discarded.
+
+    Returns:
+        results: Optimization results
+    """
     if conv_params is None:
         conv_params = {}
+
+    # Set up xtb directories with topologies once for the whole optimization
+    topologies = list(topologies)
     if path is None:
-        path = Path.cwd()
+        temp_dirs = [TemporaryDirectory(dir=config.TMP_DIR) for _ in topologies]
+        xtb_paths = [Path(temp_dir.name) for temp_dir in temp_dirs]
     else:
         path = Path(path)
         path.mkdir(exist_ok=True)
-    results = OptResults()
+        temp_dirs = []
+        xtb_paths = [path / str(i) for i in range(len(topologies))]
+    _write_topologies(topologies, xtb_paths)
+
+    # Normalize keywords and split threads and CPUs between topologies once
+    keywords = _gfnff_keywords(keywords)
+    n_threads = max(1, config.OMP_NUM_THREADS // len(topologies))
+    cpu_groups = None
+    if config.CPU_AFFINITY is True:
+        cpu_groups = split_cpus(len(topologies), n_threads)
 
     mole = get_pyscf_mole(elements, coordinates)
 
+    # Store initial point and up to maxsteps steps
+    results = OptResults.allocate(maxsteps + 1, mole.natm, len(topologies))
+
     e_g_partial = functools.partial(
         e_g_function,
         topologies=topologies,
@@ -211,21 +452,33 @@ def ts_from_gfnff(
         e_shift=e_shift,
         coupling=coupling,
         path=path,
+        elements=mole.atom_charges(),
+        coordinates_buffer=np.empty((mole.natm, 3)),
+        xtb_paths=xtb_paths,
+        n_threads=n_threads,
+        cpu_groups=cpu_groups,
     )
 
     if solver == "pyberny":
         pyscf_solver = berny_solver
     elif solver == "geometric":
         pyscf_solver = geometric_solver
-    with redirect_stdout(StringIO()) as stdout, redirect_stderr(StringIO()) as stderr:
-        pyscf_solver.optimize(
-            as_pyscf_method(mole, e_g_partial),
-            maxsteps=maxsteps,
-            callback=callback,
-            **conv_params,
-        )
-    results.stdout = stdout.getvalue()
-    results.stderr = stderr.getvalue()
+    try:
+        with _redirect_output(capture_output) as (stdout, stderr):
+            pyscf_solver.optimize(
+                as_pyscf_method(mole, e_g_partial),
+                maxsteps=maxsteps,
+                callback=callback,
+                **conv_params,
+            )
+    finally:
+        # Clean up temporary directories
+        for temp_dir in temp_dirs:
+            temp_dir.cleanup()
+    results.trim()
+    if stdout is not None and stderr is not None:
+        results.stdout = stdout.getvalue()
+        results.stderr = stderr.getvalue()
 
     return results
 
@@ -241,8 +494,31 @@ def ts_from_gfnff_python(
     conv_params: Optional[dict[str, Any]] = None,
     solver: str = "geometric",
     path: Optional[Union[str, PathLike]] = None,
+    capture_output: bool = False,
+    parallel: bool = False,
 ) -> OptResults:
-    """Optimize TS with GFNFF."""
+    """Optimize TS with GFNFF.
+
+    Args:
+        elements: Elements as atomic symbols or numbers
+        coordinates: Coordinates (Å)
+        calculators: xtb-python calculators of diabatic states
+        e_shift: Energy shift of last diabatic state (a.u.)
+        coupling: Coupling term of EVB (a.u.)
+        maxsteps: Maximum number of optimization steps
+        callback: Callback of optimizer, called after each step
+        conv_params: Convergence parameters of optimizer
+        solver: Optimizer: 'geometric' or 'pyberny'
+        path: Directory to run calculations in
+        capture_output: Whether to store optimizer output in stdout and stderr of
+            the results. Otherwise, it is discarded.
+        parallel: Whether to run calculators in parallel threads. Off by default, as
+            each thread runs xtb with its own team of config.OMP_NUM_THREADS OpenMP
+            threads. Turn on when that times the number of calculators fits the CPUs.
+
+    Returns:
+        results: Optimization results
+    """
     if conv_params is None:
         conv_params = {}
     if path is None:
@@ -250,10 +526,12 @@ def ts_from_gfnff_python(
     else:
         path = Path(path)
         path.mkdir(exist_ok=True)
-    results = OptResults()
 
     mole = get_pyscf_mole(elements, coordinates)
 
+    # Store initial point and up to maxsteps steps
+    results = OptResults.allocate(maxsteps + 1, mole.natm, len(calculators))
+
     e_g_partial = functools.partial(
         e_g_function_python,
         calculators=calculators,
@@ -261,13 +539,15 @@ def ts_from_gfnff_python(
         e_shift=e_shift,
         coupling=coupling,
         path=path,
+        coordinates_buffer=np.empty((mole.natm, 3)),
+        parallel=parallel,
     )
 
     if solver == "pyberny":
         pyscf_solver = berny_solver
     elif solver == "geometric":
         pyscf_solver = geometric_solver
-    with redirect_stdout(StringIO()) as stdout, redirect_stderr(StringIO()) as stderr:
+    with _redirect_output(capture_output) as (stdout, stderr):
         pyscf_solver.optimize(
             as_pyscf_method(mole, e_g_partial),
             maxsteps=maxsteps,
@@ -275,12 +555,84 @@ def ts_from_gfnff_python(
             **conv_params,
         )
 
-    results.stdout = stdout.getvalue()
-    results.stderr = stderr.getvalue()
+    results.trim()
+    if stdout is not None and stderr is not None:
+        results.stdout = stdout.getvalue()
+        results.stderr = stderr.getvalue()
 
     return results
 
 
+def ts_from_gfnff_python_batch(
+    cases: Sequence[Mapping[str, Any]],
+    n_workers: Optional[int] = None,
+    n_threads: int = 1,
+    kw_calculators: Optional[Mapping[str, Any]] = None,
+) -> list[OptResults]:
+    """Optimize TSs with GFNFF for several cases in parallel processes.
+
+    xtb-python calculators cannot be sent to other processes, so each case gives the
+    coordinates of the diabatic states and the calculators are set up in the workers.
+    Workers are spawned with n_threads OpenMP threads and, if config.CPU_AFFINITY is
+    True, pinned to separate CPUs. Callers should guard the main module with
+    'if __name__ == "__main__"' as workers are spawned.
+
+    Args:
+        cases: Keyword arguments to ts_from_gfnff_python for each case, with
+            'coordinates_calculators' (coordinates of diabatic states, Å) instead of
+            'calculators'
+        n_workers: Number of worker processes. Defaults to number of CPUs over
+            n_threads.
+        n_threads: Number of OpenMP threads per worker
+        kw_calculators: Keyword arguments to setup_gfnff_calculators_python
+
+    Returns:
+        results: Optimization results for each case
+    """
+    if kw_calculators is None:
+        kw_calculators = {}
+    if n_workers is None:
+        n_workers = max(1, (os.cpu_count() or 1) // n_threads)
+    cpu_groups = None
+    if config.CPU_AFFINITY is True:
+        cpu_groups = split_cpus(n_workers, n_threads)
+
+    # Spawned workers load xtb when they re-import the main module, before the
+    # initializer runs. The environment is therefore set while submitting, which
+    # is when the workers are started, and restored afterwards.
+    context = multiprocessing.get_context("spawn")
+    worker_partial = functools.partial(
+        ts_from_gfnff_python_case, kw_calculators=kw_calculators
+    )
+    env = {"OMP_NUM_THREADS": f"{n_threads},1", "MKL_NUM_THREADS": f"{n_threads}"}
+    with ProcessPoolExecutor(
+        max_workers=n_workers,
+        mp_context=context,
+        initializer=init_worker,
+        initargs=(cpu_groups, context.Value("i", 0)),
+    ) as executor:
+        with _set_environ(env):
+            futures = [executor.submit(worker_partial, case) for case in cases]
+        results = [future.result() for future in futures]
+
+    return results
+
+
+@contextmanager
+def _set_environ(env: Mapping[str, str]) -> Iterator[None]:
+    """Temporarily set environment variables."""
+    old_env = {key: os.environ.get(key) for key in env}
+    os.environ.update(env)
+    try:
+        yield
+    finally:
+        for key, value in old_env.items():
+            if value is None:
+                del os.environ[key]
+            else:
+                os.environ[key] = value
+
+
 def ts_from_gfnff_ci_python(
     elements: Union[Sequence[int], Sequence[str]],
     coordinates: ArrayLike2D,
@@ -304,17 +656,21 @@ def ts_from_gfnff_ci_python(
 
     mole = get_pyscf_mole(elements, coordinates)
 
+    # Both states are evaluated at the same geometry and can share the buffer
+    coordinates_buffer = np.empty((mole.natm, 3))
     e_g_partial_1 = functools.partial(
         e_g_function_ci_python,
         calculator=calculators[0],
         e_shift=0,
         path=path,
+        coordinates_buffer=coordinates_buffer,
     )
     e_g_partial_2 = functools.partial(
         e_g_function_ci_python,
         calculator=calculators[1],
         e_shift=e_shift,
         path=path,
+        coordinates_buffer=coordinates_buffer,
     )
 
     _, opt_mole = optimize_ci(
@@ -326,9 +682,7 @@ def ts_from_gfnff_ci_python(
         **conv_params,
     )
 
-    opt_coordinates: Array2D = (
-        np.ascontiguousarray(opt_mole.atom_coords()) * BOHR_TO_ANGSTROM
-    )
+    opt_coordinates = _get_coordinates(opt_mole)
 
     return opt_coordinates
 
@@ -337,18 +691,33 @@ def get_pyscf_mole(
     elements: Union[Sequence[int], Sequence[str]],
     coordinates: ArrayLike2D,
 ) -> "Mole":
-    """Return PySCF atom list."""
+    """Return PySCF Mole.
+
+    Built Moles are cached by elements, so that repeated calls for the same system only
+    set the geometry on a copy instead of building from scratch.
+
+    Args:
+        elements: Elements as atomic symbols or numbers
+        coordinates: Coordinates (Å)
+
+    Returns:
+        mole: PySCF Mole
+    """
     elements = convert_elements(elements, output="symbols")
-    coordinates = np.array(coordinates)
-    atoms = []
-    for element, coord in zip(elements, coordinates):
-        atoms.append((element, tuple(coord)))
+    symbols = tuple(element.capitalize() for element in elements)
+    mole: Mole = _build_pyscf_mole(symbols).copy()
+    mole.set_geom_(np.asarray(coordinates, dtype=float), unit="Angstrom")
 
-    numbers = convert_elements(elements, output="numbers")
-    n_electrons = sum(numbers)
+    return mole
+
+
+@functools.lru_cache(maxsize=32)
+def _build_pyscf_mole(symbols: tuple[str, ...]) -> "Mole":
+    """Returns built PySCF Mole with placeholder geometry, to be copied by callers."""
+    n_electrons = sum(atomic_numbers[symbol] for symbol in symbols)
     mole = Mole(verbose=0, basis="def2svp")
     mole.spin = n_electrons % 2
-    mole.atom = atoms
+    mole.atom = [(symbol, (2.0 * i, 0.0, 0.0)) for i, symbol in enumerate(symbols)]
     mole.build()
 
     return mole
@@ -388,7 +757,6 @@ def optimize_ci(
             g_scanner.atmlst = np.where(method.mol.atom_charges() != 0)[0]
         g_scanners.append(g_scanner)
 
-    tmpf = tempfile.mktemp(dir=lib.param.TMPDIR)
     engine_1 = geometric_solver.PySCFEngine(g_scanners[0])
     engine_2 = geometric_solver.PySCFEngine(g_scanners[1])
     M = engine_1.M
@@ -416,13 +784,17 @@ def optimize_ci(
         kwargs["logIni"] = os.path.abspath(os.path.join(__file__, "..", "log.ini"))
 
     engine.assert_convergence = assert_convergence
-    try:
-        geometric.optimize.run_optimizer(
-            customengine=engine, input=tmpf, constraints=constraints, **kwargs
-        )
-        conv = True
-        # method.mol.set_geom_(m.xyzs[-1], unit='Angstrom')
-    except geometric_solver.NotConvergedError as e:
-        lib.logger.note(method, str(e))
-        conv = False
+
+    # geomeTRIC files are removed together with the temporary directory
+    with TemporaryDirectory(dir=lib.param.TMPDIR) as temp_dir:
+        tmpf = os.path.join(temp_dir, "geom")
+        try:
+            geometric.optimize.run_optimizer(
+                customengine=engine, input=tmpf, constraints=constraints, **kwargs
+            )
+            conv = True
+            # method.mol.set_geom_(m.xyzs[-1], unit='Angstrom')
+        except geometric_solver.NotConvergedError as e:
+            lib.logger.note(method, str(e))
+            conv = False
     return conv, engine.mol
@@ -21,3 +21,4 @@ ArrayND = np.ndarray
 Array1D = ArrayND
 Array2D = ArrayND
 Array3D = ArrayND
+Array4D = ArrayND
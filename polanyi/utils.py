@@ -7,6 +7,7 @@ from dataclasses import dataclass
 from importlib import import_module
 from itertools import groupby, zip_longest
 from numbers import Integral
+import os
 from typing import Any, cast, Literal, Optional, overload, Union
 
 from polanyi.data import atomic_numbers, atomic_symbols
@@ -153,3 +154,23 @@ def convert_elements(
         return elements
     else:
         raise TypeError("elements must be all integers or all strings.")
+
+
+def split_cpus(n_groups: int, n_cpus: int) -> Optional[list[list[int]]]:
+    """Split CPUs available to the process into disjoint groups.
+
+    Args:
+        n_groups: Number of groups
+        n_cpus: Number of CPUs per group
+
+    Returns:
+        groups: CPU indices for each group. None if CPU affinity is not supported on
+            the platform or too few CPUs are available.
+    """
+    if not hasattr(os, "sched_getaffinity"):
+        return None
+    cpus = sorted(os.sched_getaffinity(0))
+    if len(cpus) < n_groups * n_cpus:
+        return None
+    groups = [cpus[i * n_cpus : (i + 1) * n_cpus] for i in range(n_groups)]
+    return groups
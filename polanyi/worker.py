@@ -0,0 +1,59 @@
+"""Worker processes for parallel TS searches.
+
+The OpenMP environment of the workers is set by the parent when they are started,
+as the workers may load xtb before the initializer runs.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Mapping
+import os
+from typing import Any, Optional, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from multiprocessing.sharedctypes import Synchronized
+
+    from polanyi.pyscf import OptResults
+
+
+def init_worker(
+    cpu_groups: Optional[list[list[int]]], counter: Synchronized[int]
+) -> None:
+    """Pin worker process to its group of CPUs.
+
+    Args:
+        cpu_groups: Groups of CPUs to pin workers to, assigned in order of start
+        counter: Shared counter of started workers
+    """
+    if cpu_groups is None:
+        return
+    with counter.get_lock():
+        index = counter.value
+        counter.value += 1
+    os.sched_setaffinity(0, cpu_groups[index % len(cpu_groups)])
+
+
+def ts_from_gfnff_python_case(
+    case: Mapping[str, Any], kw_calculators: Mapping[str, Any]
+) -> OptResults:
+    """Set up calculators and optimize TS for case of ts_from_gfnff_python_batch.
+
+    Args:
+        case: Keyword arguments to ts_from_gfnff_python, with 'coordinates_calculators'
+            instead of 'calculators'
+        kw_calculators: Keyword arguments to setup_gfnff_calculators_python
+
+    Returns:
+        results: Optimization results
+    """
+    # Import lazily to keep xtb out of the imports of this module
+    from polanyi.pyscf import ts_from_gfnff_python
+    from polanyi.workflow import setup_gfnff_calculators_python
+
+    kwargs = dict(case)
+    calculators = setup_gfnff_calculators_python(
+        kwargs["elements"], kwargs.pop("coordinates_calculators"), **kw_calculators
+    )
+    results = ts_from_gfnff_python(calculators=calculators, **kwargs)
+
+    return results
@@ -2,7 +2,6 @@
 from __future__ import annotations
 
 from collections.abc import Iterable, MutableMapping
-from itertools import islice
 import json
 import os
 from os import PathLike
@@ -101,16 +100,34 @@ class XTBCalculator:
         return self._method
 
     @overload
-    def sp(self, return_gradient: Literal[True]) -> tuple[float, Array2D]:
+    def sp(
+        self, return_gradient: Literal[True], pipe_output: bool = True
+    ) -> tuple[float, Array2D]:
         ...
 
     @overload
-    def sp(self, return_gradient: Literal[False]) -> float:
+    def sp(self, return_gradient: Literal[False], pipe_output: bool = True) -> float:
         ...
 
-    def sp(self, return_gradient: bool = True) -> Union[float, tuple[float, Array2D]]:
-        """Do single point calculation and return result."""
-        with pipes() as _:
+    def sp(
+        self, return_gradient: bool = True, pipe_output: bool = True
+    ) -> Union[float, tuple[float, Array2D]]:
+        """Do single point calculation and return result.
+
+        Args:
+            return_gradient: Whether to return gradient
+            pipe_output: Whether to pipe away output from xtb. Set to False when
+                output is already piped, e.g., for calculations run concurrently in
+                threads under a common pipe.
+
+        Returns:
+            energy: Energy (a.u.)
+            gradient: Gradient (a.u.), if return_gradient is True
+        """
+        if pipe_output is True:
+            with pipes() as _:
+                results = self.calculator.singlepoint()
+        else:
             results = self.calculator.singlepoint()
         energy: float = results.get_energy()
 
@@ -127,10 +144,27 @@ def run_xtb(
     path: Optional[Union[str, PathLike]] = None,
     keywords: Optional[Iterable[str]] = None,
     xcontrol_keywords: Optional[MutableMapping[str, list[str]]] = None,
+    n_threads: Optional[int] = None,
+    cpus: Optional[Iterable[int]] = None,
 ) -> CompletedProcess:
-    """Run standalone xtb in from command line."""
+    """Run standalone xtb in from command line.
+
+    Args:
+        elements: Elements as atomic symbols or numbers
+        coordinates: Coordinates (Å)
+        path: Directory to run xtb in. Defaults to current working directory.
+        keywords: Command line keywords to xtb
+        xcontrol_keywords: Keywords for xcontrol file
+        n_threads: Number of OpenMP threads. Defaults to config.OMP_NUM_THREADS.
+        cpus: CPUs to pin xtb to with taskset. Ignored if taskset is not available.
+
+    Returns:
+        process: Completed xtb process
+    """
     if keywords is None:
         keywords = []
+    if n_threads is None:
+        n_threads = config.OMP_NUM_THREADS
     if path is not None:
         path = Path(path)
     else:
@@ -142,10 +176,12 @@ def run_xtb(
     if xcontrol_keywords is not None:
         write_xcontrol(path / "xcontrol", xcontrol_keywords)
         command += " -I xcontrol"
+    if cpus is not None and shutil.which("taskset") is not None:
+        command = f"taskset -c {','.join(str(cpu) for cpu in cpus)} " + command
     with open(path / "xtb.out", "w") as stdout, open(path / "xtb.err", "w") as stderr:
         env = dict(os.environ)
-        env["OMP_NUM_THREADS"] = f"{config.OMP_NUM_THREADS},1"
-        env["MKL_NUM_THREADS"] = f"{config.OMP_NUM_THREADS}"
+        env["OMP_NUM_THREADS"] = f"{n_threads},1"
+        env["MKL_NUM_THREADS"] = f"{n_threads}"
         env["OMP_STACKSIZE"] = config.OMP_STACKSIZE
         env["OMP_MAX_ACTIVE_LEVELS"] = str(config.OMP_MAX_ACTIVE_LEVELS)
         process = subprocess.run(
@@ -440,46 +476,24 @@ def parse_wbo(file: Union[str, PathLike], n_atoms: Optional[int] = None) -> Arra
     return bo_matrix
 
 
-def parse_engrad(file: Union[str, PathLike]) -> tuple[float, Array2D]:  # noqa: C901
+def parse_engrad(file: Union[str, PathLike]) -> tuple[float, Array2D]:
     """Parse xtb engrad file to return energy and gradient."""
 
-    def read_atoms(iterlines: Iterable[str]) -> int:
-        """Read atoms."""
-        for line in islice(iterlines, 1, None):
-            if "#" in line:
-                break
-            n_atoms = int(line.strip().split()[0])
-        return n_atoms
-
-    def read_energy(iterlines: Iterable[str]) -> float:
-        """Read energy."""
-        for line in islice(iterlines, 1, None):
-            if "#" in line:
-                break
-            energy = float(line.strip().split()[0])
-        return energy
-
-    def read_gradient(iterlines: Iterable[str]) -> Array2D:
-        """Read gradient."""
-        gradient = []
-        for line in islice(iterlines, 1, None):
-            if "#" in line:
-                break
-            gradient.append(float(line.strip().split()[0]))
-        gradient = np.array(gradient)
-        return gradient
-
-    with open(file) as f:
-        lines = f.readlines()
-    iterlines = iter(lines)
-    for line in iterlines:
-        if "Number of atoms" in line:
-            n_atoms = read_atoms(iterlines)
-        if "The current total energy in Eh" in line:
-            energy = read_energy(iterlines)
-        if "# The current gradient in Eh/bohr" in line:
-            gradient = read_gradient(iterlines)
-    gradient = np.array(gradient).reshape(n_atoms, 3)
+    def read_block(header: bytes) -> bytes:
+        """Read data block between section header and next comment line."""
+        start = data.index(header)
+        start = data.index(b"\n", data.index(b"#", data.index(b"\n", start))) + 1
+        end = data.find(b"#", start)
+        if end == -1:
+            end = len(data)
+        return data[start:end]
+
+    with open(file, "rb") as f:
+        data = f.read()
+    n_atoms = int(read_block(b"Number of atoms"))
+    energy = float(read_block(b"The current total energy in Eh"))
+    gradient = np.fromstring(read_block(b"The current gradient in Eh/bohr"), sep=" ")
+    gradient = gradient.reshape(n_atoms, 3)
     return energy, gradient
 
 
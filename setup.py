@@ -18,6 +18,7 @@ setuptools.setup(
     packages=["polanyi"],
     python_requires=">=3.8",
     install_requires=["numpy", "scipy", "wurlitzer"],
+    extras_require={"numba": ["numba"]},
     entry_points={
         "console_scripts": [
             "polanyi_xtb_interface=polanyi.xtb_interface:main",
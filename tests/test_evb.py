@@ -0,0 +1,33 @@
+"""Tests for EVB module."""
+
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+from polanyi.evb import evb_eigenvalues, evb_eigenvalues_nb
+
+
+@pytest.mark.parametrize("coupling", [0.0, 0.001, 0.05])
+@pytest.mark.parametrize("energies", [(-1.2, -1.1), (-1.1, -1.2), (0.3, 0.3001)])
+def test_evb_eigenvalues_nb(energies: tuple[float, float], coupling: float) -> None:
+    """Test that analytic two-state EVB agrees with diagonalization."""
+    rng = np.random.default_rng(0)
+    gradients = rng.normal(scale=0.01, size=(2, 5, 3))
+
+    energies_ref, gradients_ref, indices_ref = evb_eigenvalues(
+        np.array(energies), gradients=gradients, coupling=coupling
+    )
+    energies_ad, gradients_ad, indices = evb_eigenvalues_nb(
+        np.array(energies), gradients, coupling
+    )
+
+    assert np.allclose(energies_ad, energies_ref)
+    assert np.allclose(gradients_ad, np.stack(gradients_ref))
+    assert indices.tolist() == indices_ref
+
+
+def test_evb_eigenvalues_nb_states() -> None:
+    """Test that other numbers of states than two are rejected."""
+    with pytest.raises(ValueError):
+        evb_eigenvalues_nb(np.zeros(3), np.zeros((3, 5, 3)), 0.001)
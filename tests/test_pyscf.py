@@ -0,0 +1,81 @@
+"""Tests for PySCF interface."""
+
+import numpy as np
+import pytest
+
+for module in ("geometric", "loguru", "morfeus", "pyscf", "wurlitzer", "xtb"):
+    pytest.importorskip(module)
+
+from polanyi.pyscf import OptResults, ts_from_gfnff_python_batch  # noqa: E402
+
+ELEMENTS = ["O", "H", "H"]
+COORDINATES = np.array([[0.0, 0.0, -0.39], [0.0, 0.76, 0.2], [0.0, -0.76, 0.2]])
+
+
+def add_steps(results: OptResults, n_steps: int, n_atoms: int, n_states: int) -> None:
+    """Add steps with values given by the step number."""
+    for i in range(n_steps):
+        results.add_step(
+            np.full((n_atoms, 3), i),
+            np.full(n_states, i),
+            np.full(n_states, -i),
+            np.full((n_states, n_atoms, 3), i),
+            np.full((n_states, n_atoms, 3), -i),
+            np.full(n_states, i % 2),
+        )
+
+
+@pytest.mark.parametrize("n_allocated", [0, 1, 2, 5])
+def test_opt_results_grow(n_allocated: int) -> None:
+    """Test that results grow past the preallocated number of steps."""
+    n_steps, n_atoms, n_states = 5, 4, 2
+    results = OptResults.allocate(n_allocated, n_atoms, n_states)
+    add_steps(results, n_steps, n_atoms, n_states)
+    results.trim()
+
+    steps = np.arange(n_steps)
+    assert results.n_steps == n_steps
+    assert results.coordinates.shape == (n_steps, n_atoms, 3)
+    assert results.gradients_adiabatic.shape == (n_steps, n_states, n_atoms, 3)
+    assert np.array_equal(results.coordinates[:, 0, 0], steps)
+    assert np.array_equal(results.energies_diabatic[:, 0], steps)
+    assert np.array_equal(results.energies_adiabatic[:, 0], -steps)
+    assert np.array_equal(results.gradients_diabatic[:, 0, 0, 0], steps)
+    assert np.array_equal(results.gradients_adiabatic[:, 0, 0, 0], -steps)
+    assert np.array_equal(results.indices[:, 0], steps % 2)
+    assert results.indices.dtype.kind == "i"
+
+
+def test_opt_results_default() -> None:
+    """Test that results without preallocation take shapes from the first step."""
+    results = OptResults()
+    add_steps(results, 3, 4, 2)
+    results.trim()
+
+    assert results.n_steps == 3
+    assert results.coordinates.shape == (3, 4, 3)
+    assert results.gradients_diabatic.shape == (3, 2, 4, 3)
+
+
+def test_ts_from_gfnff_python_batch() -> None:
+    """Smoke test of TS optimizations in parallel processes."""
+    coordinates_stretched = COORDINATES.copy()
+    coordinates_stretched[1, 1] += 0.3
+    cases = [
+        {
+            "elements": ELEMENTS,
+            "coordinates": coordinates,
+            "coordinates_calculators": [COORDINATES, coordinates_stretched],
+            "maxsteps": 3,
+            "conv_params": {"assert_convergence": False},
+        }
+        for coordinates in (COORDINATES, coordinates_stretched)
+    ]
+    results = ts_from_gfnff_python_batch(cases, n_workers=2, n_threads=1)
+
+    assert len(results) == 2
+    for results_ in results:
+        assert isinstance(results_, OptResults)
+        assert results_.n_steps > 0
+        assert results_.coordinates.shape == (results_.n_steps, 3, 3)
+        assert np.all(np.isfinite(results_.energies_adiabatic))
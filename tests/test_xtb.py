@@ -0,0 +1,28 @@
+"""Tests for xtb interface."""
+
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+for module in ("loguru", "morfeus", "wurlitzer", "xtb"):
+    pytest.importorskip(module)
+
+from polanyi.xtb import parse_engrad  # noqa: E402
+
+DATA_DIR = Path(__file__).parent / "data"
+
+
+def test_parse_engrad() -> None:
+    """Test parsing of energy and gradient from xtb engrad file."""
+    energy, gradient = parse_engrad(DATA_DIR / "xtb.engrad")
+    ref_gradient = np.array(
+        [
+            [0.0, 0.0, -0.000158925104],
+            [0.0, 0.000136581727, 0.000079462552],
+            [0.0, -0.000136581727, 0.000079462552],
+        ]
+    )
+    assert energy == pytest.approx(-5.070544440612)
+    assert gradient.shape == (3, 3)
+    assert np.allclose(gradient, ref_gradient)